@@ -127,7 +127,14 @@ def parse_challenge(auth_header: str) -> RegistryChallenge:
 
 
 class BearerAuth(httpx.Auth):
-    def __init__(self, username: str, password: str, challenge: RegistryChallenge, scope: Scope):
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        challenge: RegistryChallenge,
+        scope: Scope,
+        client: Optional[httpx.Client] = None,
+    ):
         assert challenge.scheme == ChallengeScheme.Bearer
         self._username = username
         self._password = password
@@ -135,6 +142,7 @@ class BearerAuth(httpx.Auth):
         self._auth_header = {"Authorization": f"Basic {token}"}
         self._challenge = challenge
         self._scope = scope
+        self._client = client
 
     def auth_flow(self, request: httpx.Request):
         scope = str(self._scope)
@@ -161,22 +169,27 @@ class BearerAuth(httpx.Auth):
         header = self._auth_header
         if request.url.netloc.endswith(b"docker.io") and not (self._username or self._password):
             header = None
-        resp = httpx.Client().get(challenge.realm, headers=header, params=params)
+        if self._client is None:
+            with httpx.Client() as client:
+                resp = client.get(challenge.realm, headers=header, params=params)
+        else:
+            resp = self._client.get(challenge.realm, headers=header, params=params, auth=None)
         return BearerToken(resp)
 
 
 def request_hook(request: httpx.Request):
-    logger.debug(f"{request.method} {request.url} {request.headers}")
+    logger.debug("{} {} {}", request.method, request.url, request.headers)
 
 
 def response_hook(response: httpx.Response):
-    logger.debug(f"RESPONSE: {response.status_code} {response.url} {response.headers}")
+    logger.debug("RESPONSE: {} {} {}", response.status_code, response.url, response.headers)
 
 
 class AuthClient(httpx.Client):
     #
     def __init__(self, *args, **kwargs):
         self.__need_auth = True
+        self.__pinged = False
         self._username = ""
         self._password = ""
         super(AuthClient, self).__init__(*args, **kwargs)
@@ -192,19 +205,19 @@ class AuthClient(httpx.Client):
         return self.__challenge
 
     def ping(self):
-        c = httpx.Client(base_url=self.base_url)
-        resp = c.get("/v2/")
+        resp = self.get("/v2/", auth=None)
         _auth_header = resp.headers.get("www-authenticate")
         if not _auth_header:
             # docker registry proxy, like: `hub-mirror.c.163.com`
             self.__need_auth = False
-            return
-        self.__challenge = parse_challenge(auth_header=_auth_header)
+        else:
+            self.__challenge = parse_challenge(auth_header=_auth_header)
+        self.__pinged = True
 
     def new_auth(self, auth_by: Optional[Union[Tuple[str, str], Scope]] = None) -> httpx.Auth:
         if auth_by is None:
             return httpx.Auth()
-        if self.__challenge is None:
+        if not self.__pinged:
             self.ping()
         if not self.__need_auth:
             return httpx.Auth()
@@ -213,7 +226,7 @@ class AuthClient(httpx.Client):
         elif self.challenge.scheme == ChallengeScheme.Basic:
             return httpx.BasicAuth(self._username, self._password)
         elif self.challenge.scheme == ChallengeScheme.Bearer and isinstance(auth_by, Scope):
-            return BearerAuth(self._username, self._password, self.__challenge, auth_by)
+            return BearerAuth(self._username, self._password, self.__challenge, auth_by, client=self)
         return httpx.Auth()
 
     def _build_auth(self, auth: Optional[httpx._types.AuthTypes]) -> Optional[httpx.Auth]:
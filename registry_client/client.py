@@ -1,16 +1,24 @@
 #!/usr/bin/env python3
 # encoding : utf-8
 # create at: 2022/9/24-下午4:06
+import hashlib
+import hmac
 import json
 import pathlib
 import re
 import tempfile
 import typing
-from typing import List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Tuple, Union
 
 import httpx
 from loguru import logger
 
+try:
+    from isal import isal_zlib as zlib_mod
+except ImportError:
+    import zlib as zlib_mod
+
 from registry_client import errors, spec
 from registry_client.auth import AuthClient
 from registry_client.digest import Digest
@@ -31,8 +39,12 @@ from registry_client.utlis import (
     DEFAULT_REGISTRY_HOST,
     DEFAULT_REPO,
     diff_ids_to_chain_ids,
+    json_loads,
 )
 
+MAX_CONCURRENT_DOWNLOADS = 5
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
 
 class RegistryClient:
     def __init__(
@@ -41,7 +53,16 @@ class RegistryClient:
         username: str = "",
         password: str = "",
         skip_verify=False,
+        http2: bool = False,
     ):
+        """
+        Args:
+            host (str): registry address, like https://registry-1.docker.io
+            username (str): registry username
+            password (str): registry password
+            skip_verify (bool): skip verifying the registry certificate
+            http2 (bool): negotiate HTTP/2 with the registry, requires the `h2` package
+        """
         self._username = username
         self._password = password
         self.client = AuthClient(
@@ -49,6 +70,7 @@ class RegistryClient:
             auth=(username, password),
             verify=not skip_verify,
             follow_redirects=True,
+            http2=http2,
         )
         self._registry_client = RepoClient(self.client)
         self._image_client = ImageClient(self.client)
@@ -128,11 +150,11 @@ class RegistryClient:
 
         digest_ref = self._get_manifest_digest(ref)
         manifest_resp = self._get_manifest(digest_ref, platform)
-        manifest = spec.Manifest(**manifest_resp.json())
+        manifest = spec.Manifest(**json_loads(manifest_resp.content))
 
         image_digest_ref = CanonicalReference(ref.domain, ref.path, digest=manifest.config.digest)
         resp = self._image_client.get_config(image_digest_ref)
-        return spec.Image(**resp.json())
+        return spec.Image(**json_loads(resp.content))
 
     def pull_image(
         self,
@@ -162,11 +184,11 @@ class RegistryClient:
 
         digest_ref = self._get_manifest_digest(ref)
         manifest_resp = self._get_manifest(digest_ref, platform)
-        manifest = spec.Manifest(**manifest_resp.json())
+        manifest = spec.Manifest(**json_loads(manifest_resp.content))
 
         image_digest_ref = CanonicalReference(ref.domain, ref.path, digest=manifest.config.digest)
         image_config_resp = self._image_client.get_config(image_digest_ref)
-        image_config = spec.Image(**image_config_resp.json())
+        image_config = spec.Image(**json_loads(image_config_resp.content))
         target = ref.target
         image_save_path = save_dir.joinpath(f"{re.sub(r'[.:/]', '_', ref.name)}_{target}.tar")
 
@@ -176,6 +198,7 @@ class RegistryClient:
                 image_name=image_name,
                 save_dir=temp_dir_path,
                 manifest=manifest_resp,
+                manifest_spec=manifest,
                 image_config=image_config_resp,
             )
             image_path = OCIImageTar(src_dir=temp_dir_path, target_path=image_save_path).do()
@@ -184,8 +207,9 @@ class RegistryClient:
                 ref=image_digest_ref,
                 image_name=image_name,
                 save_dir=temp_dir_path,
-                manifest=manifest_resp,
+                manifest_spec=manifest,
                 image_config=image_config_resp,
+                image_config_spec=image_config,
             )
             image_path = ImageV2Tar(src_dir=temp_dir_path, target_path=image_save_path).do()
         else:
@@ -194,32 +218,60 @@ class RegistryClient:
         return image_path
 
     def _download_blob(self, ref: CanonicalReference, target: pathlib.Path, content_encoding=None):
+        """
+        stream blob into target, the blob digest is checked against the bytes on the wire,
+        gzip layers are decompressed in the same pass
+        """
+        hasher = hashlib.new(ref.digest.algom.value)
+        decompressor = zlib_mod.decompressobj(16 + zlib_mod.MAX_WBITS) if content_encoding == "gzip" else None
         with open(target, "wb") as f:
             with self._blob_client.get(ref, stream=True) as resp:
-                if content_encoding is not None:
-                    resp.headers["content-encoding"] = content_encoding
-                for content in resp.iter_bytes():
-                    f.write(content)
+                resp.raise_for_status()
+                for content in resp.iter_raw(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    hasher.update(content)
+                    f.write(decompressor.decompress(content) if decompressor else content)
+            if decompressor:
+                f.write(decompressor.flush())
+        blob_digest = Digest(f"{ref.digest.algom.value}:{hasher.hexdigest()}")
+        if not hmac.compare_digest(ref.digest.value, blob_digest.value):
+            raise errors.ErrDigestMismatch(ref.digest, blob_digest)
+
+    def _download_blobs(self, blobs: List[Tuple[CanonicalReference, pathlib.Path, Optional[str]]]):
+        if not blobs:
+            return
+        with ThreadPoolExecutor(max_workers=min(len(blobs), MAX_CONCURRENT_DOWNLOADS)) as executor:
+            futures = [
+                executor.submit(self._download_blob, ref, target, content_encoding=encoding)
+                for ref, target, encoding in blobs
+            ]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                # stop queued downloads on the first error or Ctrl-C, cancel() can't stop the running ones,
+                # so leaving the `with` block waits for them and the exception is re-raised afterwards
+                for future in futures:
+                    future.cancel()
+                raise
 
     def _pull_docker_v2_image(
         self,
         ref: CanonicalReference,
         image_name: str,
         save_dir: pathlib.Path,
-        manifest: httpx.Response,
+        manifest_spec: spec.Manifest,
         image_config: httpx.Response,
+        image_config_spec: spec.Image,
     ):
-        manifest_spec = spec.Manifest(**manifest.json())
-        image_config_spec = spec.Image(**image_config.json())
         layer_id_generator = diff_ids_to_chain_ids(image_config_spec.rootfs.diff_ids)
 
         layer_path_list = []
+        blobs = []
         for index, layer_id in enumerate(layer_id_generator):
             layer_save_dir = save_dir.joinpath(Digest(layer_id).hex)
             layer_save_dir.mkdir()
             layer_desc = manifest_spec.layers[index]
-            new_ref = ref
-            new_ref.digest = layer_desc.digest
+            new_ref = CanonicalReference(ref.domain, ref.path, digest=layer_desc.digest)
             layer_path = layer_save_dir.joinpath("layer.tar")
             encoding = (
                 "gzip"
@@ -230,11 +282,11 @@ class RegistryClient:
                 )
                 else None
             )
-            self._download_blob(new_ref, layer_path, content_encoding=encoding)
+            blobs.append((new_ref, layer_path, encoding))
             layer_path_list.append(str(layer_path.relative_to(save_dir).as_posix()))
+        self._download_blobs(blobs)
 
-        image_config_digest = Digest.from_bytes(image_config.content)
-        image_config_path = save_dir.joinpath(image_config_digest.hex)
+        image_config_path = save_dir.joinpath(manifest_spec.config.digest.hex)
         image_config_path.write_bytes(image_config.content)
 
         data = [
@@ -253,10 +305,11 @@ class RegistryClient:
         image_name: str,
         save_dir: pathlib.Path,
         manifest: httpx.Response,
+        manifest_spec: spec.Manifest,
         image_config: httpx.Response,
     ):
-        def write_json(content: bytes) -> typing.Tuple[Digest, pathlib.Path]:
-            d = Digest.from_bytes(content)
+        def write_json(content: bytes, d: Optional[Digest] = None) -> typing.Tuple[Digest, pathlib.Path]:
+            d = d or Digest.from_bytes(content)
             p = layer_save_dir.joinpath(f"{d.algom.value}/{d.hex}")
             p.parent.mkdir(exist_ok=True)
             p.write_bytes(content)
@@ -264,19 +317,19 @@ class RegistryClient:
 
         layer_save_dir = save_dir.joinpath("blobs")
         layer_save_dir.mkdir(parents=True)
-        layers: typing.List[spec.Descriptor] = []
-        for layer_spec in spec.Manifest(**manifest.json()).layers:
+        layer_path_list: typing.List[pathlib.Path] = []
+        blobs = []
+        for layer_spec in manifest_spec.layers:
             target_digest = layer_spec.digest
             target_temp = layer_save_dir.joinpath(f"{target_digest.algom.value}/{target_digest.hex}")
-            if target_temp.exists():
+            if target_temp in layer_path_list:
                 continue
             target_temp.parent.mkdir(exist_ok=True)
-            new_ref = ref
-            new_ref.digest = target_digest
-            self._download_blob(new_ref, target_temp)
-            size = target_temp.stat().st_size
-            layers.append(spec.Descriptor(mediaType=layer_spec.media_type, digest=target_digest, size=size))
-        write_json(image_config.content)
+            new_ref = CanonicalReference(ref.domain, ref.path, digest=target_digest)
+            blobs.append((new_ref, target_temp, None))
+            layer_path_list.append(target_temp)
+        self._download_blobs(blobs)
+        write_json(image_config.content, manifest_spec.config.digest)
 
         with save_dir.joinpath(spec.ImageLayoutFile).open("w", encoding="utf-8") as f:
             json.dump(spec.ImageLayout().dict(by_alias=True), f)
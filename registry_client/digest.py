@@ -1,6 +1,8 @@
 import hashlib
+import hmac
 import pathlib
 import re
+import sys
 from collections import UserString
 from enum import Enum
 from typing import Any, Callable, Union
@@ -9,6 +11,8 @@ from registry_client import errors
 
 DIGEST_REGEX = re.compile(r"[A-Za-z][A-Za-z0-9]*(?:[-_+.][A-Za-z][A-Za-z0-9]*)*[:][a-fA-F0-9]{32,}")
 
+HASH_CHUNK_SIZE = 1 << 20
+
 DIGEST_SIZE = {
     "sha256": 32,
     "sha384": 48,
@@ -47,6 +51,8 @@ class Digest(UserString):
 
     @classmethod
     def validate(cls, v):
+        if isinstance(v, Digest):
+            return v
         if not cls.is_digest(v):
             raise ValueError("invalid postcode format")
         return cls(v)
@@ -75,9 +81,16 @@ class Digest(UserString):
         return self.data
 
     @classmethod
-    def from_file(cls, f: pathlib.Path) -> "Digest":
+    def from_file(cls, f: pathlib.Path, algorithm: Algorithm = DEFAULT_ALGORITHM) -> "Digest":
         with open(f, "rb") as in_file:
-            return cls.from_bytes(in_file.read())
+            if sys.version_info >= (3, 11):
+                hash_value = hashlib.file_digest(in_file, algorithm.value).hexdigest()
+            else:
+                hasher = cls._get_hasher(algorithm)()
+                for chunk in iter(lambda: in_file.read(HASH_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+                hash_value = hasher.hexdigest()
+        return Digest(f"{algorithm.value}:{hash_value}")
 
     @classmethod
     def from_bytes(cls, content: bytes, algorithm: Algorithm = DEFAULT_ALGORITHM) -> "Digest":
@@ -104,4 +117,4 @@ class Digest(UserString):
 
     def validate_bytes(self, content: bytes, algorithm: Algorithm = DEFAULT_ALGORITHM):
         new_digest = self.from_bytes(content, algorithm)
-        return self == new_digest
+        return hmac.compare_digest(self.value, new_digest.value)
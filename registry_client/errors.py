@@ -56,6 +56,11 @@ class ErrDigestUnsupported(Exception):
         super(ErrDigestUnsupported, self).__init__("unsupported digest algorithm")
 
 
+class ErrDigestMismatch(Exception):
+    def __init__(self, want, got):
+        super(ErrDigestMismatch, self).__init__(f"digest mismatch, want {want}, got {got}")
+
+
 class ErrManifest(Exception):
     def __init__(self):
         super(ErrManifest, self).__init__("invalid image manifest")
@@ -1,15 +1,19 @@
+import copy
 import dataclasses
 import gzip
+import hmac
+import io
 import json
 import os
 import pathlib
 import shutil
 import tarfile
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, List, Tuple
 
 from loguru import logger
 
-from registry_client import spec
+from registry_client import errors, spec
 from registry_client.digest import Digest
 from registry_client.media_types import OCIImageMediaType
 from registry_client.utlis import diff_ids_to_chain_ids
@@ -19,6 +23,54 @@ GZIP_MAGIC = b"\x1F\x8B\x8B"
 XZ_MAGIC = b"\xFD\x37\x7A\x58\x5A\x00"
 ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
 
+COPY_BUFFER_SIZE = 1 << 20
+
+
+class SendfileTarFile(tarfile.TarFile):
+    """
+    TarFile which copies regular file members into an uncompressed archive with os.sendfile,
+    falls back to the default copy for compressed/stream archives or when sendfile fails
+    """
+
+    def addfile(self, tarinfo: tarfile.TarInfo, fileobj=None):
+        if (
+            fileobj is None
+            or not tarinfo.isreg()
+            or not hasattr(os, "sendfile")
+            or not isinstance(self.fileobj, (io.BufferedWriter, io.FileIO))
+        ):
+            return super(SendfileTarFile, self).addfile(tarinfo, fileobj)
+        self._check("awx")
+        tarinfo = copy.copy(tarinfo)
+        buf = tarinfo.tobuf(self.format, self.encoding, self.errors)
+        self.fileobj.write(buf)
+        self.offset += len(buf)
+        self._copy_member_data(fileobj, tarinfo.size)
+        blocks, remainder = divmod(tarinfo.size, tarfile.BLOCKSIZE)
+        if remainder > 0:
+            self.fileobj.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+            blocks += 1
+        self.offset += blocks * tarfile.BLOCKSIZE
+        self.members.append(tarinfo)
+
+    def _copy_member_data(self, src, size: int):
+        sent = 0
+        try:
+            self.fileobj.flush()
+            in_fd, out_fd, offset = src.fileno(), self.fileobj.fileno(), src.tell()
+            while sent < size:
+                count = os.sendfile(out_fd, in_fd, offset + sent, size - sent)
+                if count == 0:
+                    raise OSError("unexpected end of data")
+                sent += count
+        except (OSError, ValueError):
+            if sent:
+                raise
+            tarfile.copyfileobj(src, self.fileobj, size, bufsize=self.copybufsize)
+            return
+        # sendfile advanced the fd behind the buffered writer, resync its position
+        self.fileobj.seek(0, os.SEEK_END)
+
 
 class TarImageDir:
     def __init__(
@@ -45,12 +97,25 @@ class TarImageDir:
     def _check_digest(want: str, path: pathlib.Path):
         logger.info(f"check file:{path} digest == {want}")
         want_digest = Digest(want)
-        with open(path, "rb") as f:
-            get_digest = Digest.from_bytes(f.read())
-        assert want_digest == get_digest, f"{get_digest}!={want_digest}"
+        get_digest = Digest.from_file(path, want_digest.algom)
+        if not hmac.compare_digest(want_digest.value, get_digest.value):
+            raise errors.ErrDigestMismatch(want_digest, get_digest)
+
+    @classmethod
+    def _check_digests(cls, items: Iterable[Tuple[str, pathlib.Path]]):
+        """
+        check (want, path) pairs concurrently, hashlib releases the GIL while hashing large buffers
+        """
+        items = list(items)
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=min(len(items), os.cpu_count() or 1)) as executor:
+            futures = [executor.submit(cls._check_digest, want, path) for want, path in items]
+            for future in as_completed(futures):
+                future.result()
 
     def do(self) -> pathlib.Path:
-        with tarfile.open(self.target_path, "w") as tar_file:
+        with SendfileTarFile.open(self.target_path, "w") as tar_file:
             logger.info(f"tar {self.src_dir} to {self.target_path}")
             tar_file.add(self.src_dir, arcname=os.path.sep)
         final_path = self.target_path
@@ -59,7 +124,7 @@ class TarImageDir:
             logger.info(f"gzip {self.target_path} to {gzip_target}")
             with gzip.open(gzip_target, "wb") as file_out:
                 with open(self.target_path, "rb") as file_in:
-                    file_out.write(file_in.read())
+                    shutil.copyfileobj(file_in, file_out, length=COPY_BUFFER_SIZE)
             self.target_path.unlink()
             final_path = gzip_target
         if self.delete_when_done:
@@ -105,10 +170,10 @@ class ImageV2Tar(TarImageDir):
     @classmethod
     def _check_layers(cls, layers_path: List[pathlib.Path], diff_ids: List[str]):
         assert layers_path
-        for index, one_layer_path in enumerate(layers_path):
+        for one_layer_path in layers_path:
             assert one_layer_path.exists(), one_layer_path
-            logger.info(f"check layer:{one_layer_path} digest")
-            cls._check_digest(diff_ids[index], one_layer_path)
+        logger.info(f"check {len(layers_path)} layers digest")
+        cls._check_digests((diff_ids[index], path) for index, path in enumerate(layers_path))
 
     def check(self):
         image_manifest_path = self.src_dir.joinpath("manifest.json")
@@ -168,10 +233,10 @@ class OCIImageTar(TarImageDir):
         logger.info(f"check blobs:{blobs_path}/{algom}")
         blobs_dir = blobs_path.joinpath(algom)
         assert blobs_dir.exists() and blobs_dir.is_dir()
-        for file in blobs_dir.iterdir():
+        blobs = list(blobs_dir.iterdir())
+        for file in blobs:
             assert file.is_file()
-            want_digest = f"{algom}:{file.name}"
-            self._check_digest(want=want_digest, path=file)
+        self._check_digests((f"{algom}:{file.name}", file) for file in blobs)
 
     def check(self):
         oci_layout_file = self.src_dir.joinpath("oci-layout")
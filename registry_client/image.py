@@ -27,6 +27,7 @@ from registry_client.reference import (
     Reference,
 )
 from registry_client.scope import RepositoryScope
+from registry_client.utlis import json_loads
 
 MAX_MANIFEST_SIZE = 4 * 1048 * 1048
 
@@ -54,7 +55,14 @@ class BlobClient:
         scope = RepositoryScope(ref.path, actions=actions)
         url = f"/v2/{ref.path}/blobs/{ref.digest}"
         if method == "STREAM":
-            return self.client.stream("GET", url=url, auth=self.client.new_auth(auth_by=scope), params=params)
+            # streamed blobs are read raw and checked against their digest, refuse transport compression
+            return self.client.stream(
+                "GET",
+                url=url,
+                auth=self.client.new_auth(auth_by=scope),
+                params=params,
+                headers={"Accept-Encoding": "identity"},
+            )
         return self.client.request(
             method,
             url=url,
@@ -147,7 +155,7 @@ class ImageClient:
         if media_type == ImageMediaType.MediaTypeDockerSchema2Manifest.value:
             return resp
         elif media_type == ImageMediaType.MediaTypeDockerSchema2ManifestList.value:
-            manifest_list = spec.Index(**resp.json())
+            manifest_list = spec.Index(**json_loads(resp.content))
             match_manifests = filter_by_platform(manifest_list.manifests, target_platform=platform)
             for match in match_manifests:
                 new_ref = CanonicalReference(ref.domain, ref.path, digest=match.digest)
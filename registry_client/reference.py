@@ -41,13 +41,11 @@ def anchored(*res: str):
     return f"^{expression(*res)}$"
 
 
+__literal_escape = str.maketrans({c: f"\\{c}" for c in r"\.+*?()|[]{}^$"})
+
+
 def literal(v: str):
-    special = r"\.+*?()|[]{}^$"
-    v = list(v)
-    for index in range(len(v)):
-        if v[index] in special:
-            v[index] = f"\\{v[index]}"
-    return "".join(v)
+    return v.translate(__literal_escape)
 
 
 __alpha_numeric = r"[a-z0-9]+"
@@ -95,6 +93,7 @@ IDENTIFIER_REGEXP = re.compile(r"([a-f0-9]{64})")
 SHORT_IDENTIFIER_REGEXP = re.compile(r"([a-f0-9]{6,64})")
 ANCHORED_IDENTIFIER_REGEXP = re.compile(anchored(IDENTIFIER_REGEXP.pattern))
 ANCHORED_SHORT_IDENTIFIER_REGEXP = re.compile(anchored(SHORT_IDENTIFIER_REGEXP.pattern))
+DOMAIN_SEPARATOR_REGEXP = re.compile(r"[.:]")
 
 
 @dataclass
@@ -184,31 +183,23 @@ def parse(name: str) -> Reference:
     :param name:
     :return:
     """
-    result = REFERENCE_REGEXP.findall(name)
-    if not result:
+    match = REFERENCE_REGEXP.match(name)
+    if match is None:
         if name == "":
             raise errors.ErrNameEmpty()
         if not name.islower():
             raise errors.ErrNameContainsUppercase()
         raise errors.ErrReferenceInvalidFormat()
-    result = result[0]
-    if len(result[0]) > NameTotalLengthMax:
+    name_str, tag, digest_str = match.groups("")
+    if len(name_str) > NameTotalLengthMax:
         raise errors.ErrNameTooLong()
-    name_match = ANCHORED_NAME_REGEXP.findall(result[0])[0]
-    if len(name_match) == 2:
-        domain, path = name_match
-    else:
-        domain = ""
-        path = name_match[-1]
+    domain, path = ANCHORED_NAME_REGEXP.match(name_str).groups("")
     repo = NamedReference(domain, path)
-    tag = ""
     digest = None
-    if result[1]:
-        tag = result[1]
-    if result[2]:
-        if not Digest.is_digest(result[2]):
-            raise Exception(f"invalid digest format: {result[2]}")
-        digest = Digest(result[2])
+    if digest_str:
+        if not Digest.is_digest(digest_str):
+            raise Exception(f"invalid digest format: {digest_str}")
+        digest = Digest(digest_str)
     if repo.name == "":
         if digest:
             return DigestReference(digest)
@@ -224,7 +215,7 @@ def parse(name: str) -> Reference:
 
 def split_docker_domain(name: str):
     index = name.find("/")
-    if index == -1 or (not re.findall(r"[.:]", name[:index]) and name[:index] != "localhost"):
+    if index == -1 or (not DOMAIN_SEPARATOR_REGEXP.search(name, 0, index) and name[:index] != "localhost"):
         domain, remainder = DEFAULT_REGISTRY_HOST, name
     else:
         domain, remainder = name[:index], name[index + 1 :]
@@ -236,14 +227,14 @@ def split_docker_domain(name: str):
 
 
 def split_domain(name: str):
-    match = ANCHORED_NAME_REGEXP.findall(name)
-    if len(match[0]) != 2:
+    match = ANCHORED_NAME_REGEXP.match(name)
+    if match is None:
         return "", name
-    return match[0]
+    return match.groups("")
 
 
 def parse_normalized_named(name: str) -> Reference:
-    if re.match(r"^([a-f0-9]{64})$", name):
+    if ANCHORED_IDENTIFIER_REGEXP.match(name):
         raise Exception(f"invalid repository name ({name}), cannot specify 64-byte hexadecimal strings")
     domain, remainder = split_docker_domain(name)
     if remainder.find(":") != -1:
@@ -5,6 +5,11 @@ from typing import Dict, Generator, Iterable, List, Union
 
 from pydantic import BaseModel
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 IMAGE_DEFAULT_TAG: str = "latest"
 DEFAULT_REPO: str = "library"
 DEFAULT_REGISTRY_HOST: str = "registry-1.docker.io"
@@ -12,23 +17,22 @@ DEFAULT_CLIENT_ID = "registry-python-client"
 INDEX_NAME = "docker.io"
 
 
+def _next_chain_id(parent: str, diff_id: str) -> str:
+    return f"sha256:{hashlib.sha256(f'{parent} {diff_id}'.encode()).hexdigest()}"
+
+
 def get_chain_id(parent: str, ids: List[str]) -> str:
-    if not ids:
-        return parent
-    if parent == "":
-        return get_chain_id(ids[0], ids[1:])
-    value = hashlib.sha256(f"{parent} {ids[0]}".encode()).hexdigest()
-    value = f"sha256:{value}"
-    return get_chain_id(value, ids[1:])
+    for diff_id in ids:
+        parent = _next_chain_id(parent, diff_id) if parent else diff_id
+    return parent
 
 
 def diff_ids_to_chain_ids(diff_ids: Iterable[Union[str, "Digest"]]) -> Generator[str, None, None]:
     assert diff_ids
     parent = ""
     for diff_id in diff_ids:
-        chain_id = get_chain_id(parent=parent, ids=[(str(diff_id))])
-        parent = chain_id
-        yield chain_id
+        parent = _next_chain_id(parent, str(diff_id)) if parent else str(diff_id)
+        yield parent
 
 
 def get_cpu_info() -> List[Dict[str, str]]:
@@ -241,6 +241,38 @@ class TestBearerAuth:
         auth_request_checker(no_need_auth=True, return_value=return_value)
         req = flow.send(resp)
 
+    def test_token_request_by_shared_client(self, auth_request_checker, registry_auth_root):
+        username = "username"
+        password = "password"
+        service = "fake-service"
+        token = uuid.uuid1().hex
+        scope = RepositoryScope(repo_name=uuid.uuid1().hex, actions=["pull"])
+        client = AuthClient(auth=("client-user", "client-password"), headers={"x-shared-client": "yes"})
+        challenge = RegistryChallenge(scheme=ChallengeScheme.Bearer, realm=FAKE_REGISTRY_AUTH_HOST, service=service)
+        auth = BearerAuth(username, password, challenge=challenge, scope=scope, client=client)
+        return_value = httpx.Response(
+            200,
+            json={
+                "token": token,
+                "access_token": token,
+                "issued_at": datetime.datetime.now().isoformat(),
+                "expires_in": 1800,
+            },
+        )
+        auth_request_checker(
+            username=username,
+            password=password,
+            scope=scope,
+            service=service,
+            return_value=return_value,
+        )
+        flow = auth.sync_auth_flow(httpx.Request("GET", url="http://example.com"))
+        next(flow)
+        request = flow.send(httpx.Response(401))
+        assert request.headers.get("Authorization") == f"Bearer {token}"
+        assert registry_auth_root.call_count == 1
+        assert registry_auth_root.calls.last.request.headers.get("x-shared-client") == "yes"
+
     def test_error_challenge_scheme(self):
         challenge = RegistryChallenge(ChallengeScheme.Basic, realm="http://example.com")
         with pytest.raises(AssertionError):
@@ -332,6 +364,12 @@ class TestAuthClient:
         assert not auth_client.need_auth
         assert auth_client.new_auth(EmptyScope()).__class__ == httpx.Auth
 
+    def test_new_auth_ping_once(self, auth_client, registry_v2):
+        auth_client.new_auth(EmptyScope())
+        auth_client.new_auth(EmptyScope())
+        assert not auth_client.need_auth
+        assert registry_v2.call_count == 1
+
     def test_build_auth_by_tuple(self):
         client = AuthClient(auth=("foo", "bar"))
         assert client._username == "foo"
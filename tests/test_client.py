@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
 # encoding: utf-8
+import gzip
+import threading
 import typing
 
 import httpx
 import pytest
 
-from registry_client import platforms
+from registry_client import client as client_module
+from registry_client import errors, platforms
+from registry_client.auth import AuthClient
 from registry_client.client import RegistryClient
+from registry_client.digest import Digest
 from registry_client.image import ImageClient
-from registry_client.reference import parse_normalized_named
+from registry_client.reference import CanonicalReference, parse_normalized_named
 from registry_client.utlis import DEFAULT_REGISTRY_HOST, DEFAULT_REPO
 from tests.test_image import DEFAULT_IMAGE_NAME
 
@@ -43,6 +48,20 @@ class TestRegistryClient:
             options["platform"] = platforms.parse(options.get("platform"))
         self._check_pull_image(docker_registry_client, image_name=image_name, options=options)
 
+    @pytest.mark.parametrize("options, want", (({}, False), ({"http2": False}, False), ({"http2": True}, True)))
+    def test_http2_option(self, monkeypatch, options, want):
+        if want:
+            pytest.importorskip("h2")
+        client_kwargs = {}
+
+        def new_auth_client(**kwargs):
+            client_kwargs.update(kwargs)
+            return AuthClient(**kwargs)
+
+        monkeypatch.setattr(client_module, "AuthClient", new_auth_client)
+        RegistryClient(host="https://example.com", **options)
+        assert client_kwargs["http2"] is want
+
     @pytest.mark.parametrize(
         "params, want",
         (
@@ -97,3 +116,114 @@ class TestRegistryClient:
         ref_str = f"{host}/{image_name}{target}"
         ref = parse_normalized_named(ref_str)
         assert docker_registry_client.repo_tag(ref) == want
+
+    @pytest.mark.parametrize("content_encoding", ("gzip", None))
+    def test_download_blob(self, docker_registry_client, registry_blobs, tmp_path, content_encoding):
+        content = b"foo" * 1024
+        blob = gzip.compress(content)
+        registry_blobs.return_value = httpx.Response(200, content=blob)
+        ref = CanonicalReference(path="foo/bar", digest=Digest.from_bytes(blob))
+        target = tmp_path.joinpath("layer")
+        docker_registry_client._download_blob(ref, target, content_encoding=content_encoding)
+        assert target.read_bytes() == (content if content_encoding else blob)
+
+    def test_download_blob_with_isal(self, docker_registry_client, registry_blobs, tmp_path):
+        isal_zlib = pytest.importorskip("isal.isal_zlib")
+        assert client_module.zlib_mod is isal_zlib
+        content = b"foo" * 1024 * 1024
+        blob = gzip.compress(content)
+        registry_blobs.return_value = httpx.Response(200, content=blob)
+        ref = CanonicalReference(path="foo/bar", digest=Digest.from_bytes(blob))
+        target = tmp_path.joinpath("layer")
+        docker_registry_client._download_blob(ref, target, content_encoding="gzip")
+        assert target.read_bytes() == content
+
+    def test_download_blob_without_transport_encoding(self, docker_registry_client, registry_blobs, tmp_path):
+        blob = gzip.compress(b"foo" * 1024)
+
+        def side_effect(request: httpx.Request, repo, name, digest):
+            if "gzip" in request.headers.get("Accept-Encoding", ""):
+                return httpx.Response(200, content=gzip.compress(blob), headers={"Content-Encoding": "gzip"})
+            return httpx.Response(200, content=blob)
+
+        registry_blobs.side_effect = side_effect
+        ref = CanonicalReference(path="foo/bar", digest=Digest.from_bytes(blob))
+        target = tmp_path.joinpath("layer")
+        docker_registry_client._download_blob(ref, target)
+        assert registry_blobs.calls.last.request.headers["Accept-Encoding"] == "identity"
+        assert target.read_bytes() == blob
+
+    def test_download_blob_digest_mismatch(self, docker_registry_client, registry_blobs, tmp_path):
+        registry_blobs.return_value = httpx.Response(200, content=b"foo")
+        ref = CanonicalReference(path="foo/bar", digest=Digest.from_bytes(b"bar"))
+        with pytest.raises(errors.ErrDigestMismatch):
+            docker_registry_client._download_blob(ref, tmp_path.joinpath("layer"))
+
+    @staticmethod
+    def _mock_blobs(registry_blobs, blobs: typing.Dict[str, bytes]):
+        def side_effect(request: httpx.Request, repo, name, digest):
+            return httpx.Response(200, content=blobs[digest])
+
+        registry_blobs.side_effect = side_effect
+
+    def test_download_blobs(self, docker_registry_client, registry_blobs, tmp_path):
+        contents = [str(i).encode() * 1024 * (i + 1) for i in range(8)]
+        self._mock_blobs(registry_blobs, {Digest.from_bytes(c).value: c for c in contents})
+        targets = [tmp_path.joinpath(str(i)) for i in range(len(contents))]
+        docker_registry_client._download_blobs(
+            [
+                (CanonicalReference(path="foo/bar", digest=Digest.from_bytes(content)), target, None)
+                for content, target in zip(contents, targets)
+            ]
+        )
+        assert registry_blobs.call_count == len(contents)
+        for content, target in zip(contents, targets):
+            assert target.read_bytes() == content
+
+    def test_download_blobs_digest_mismatch(self, docker_registry_client, registry_blobs, tmp_path):
+        contents = [b"foo", b"bar", b"baz"]
+        blobs = {Digest.from_bytes(c).value: c for c in contents}
+        blobs[Digest.from_bytes(b"bar").value] = b"corrupted"
+        self._mock_blobs(registry_blobs, blobs)
+        with pytest.raises(errors.ErrDigestMismatch):
+            docker_registry_client._download_blobs(
+                [
+                    (
+                        CanonicalReference(path="foo/bar", digest=Digest.from_bytes(content)),
+                        tmp_path.joinpath(str(i)),
+                        None,
+                    )
+                    for i, content in enumerate(contents)
+                ]
+            )
+
+    def test_download_blobs_interrupted(self, docker_registry_client, registry_blobs, tmp_path, monkeypatch):
+        contents = [b"foo", b"bar", b"baz"]
+        blobs = {Digest.from_bytes(c).value: c for c in contents}
+        targets = [tmp_path.joinpath(str(i)) for i in range(len(contents))]
+        started, released = threading.Event(), threading.Event()
+
+        def side_effect(request: httpx.Request, repo, name, digest):
+            started.set()
+            released.wait(timeout=5)
+            return httpx.Response(200, content=blobs[digest])
+
+        def as_completed(futures):
+            # Ctrl-C while the first download is running, it is released once the queued ones are cancelled
+            futures[-1].add_done_callback(lambda _: released.set())
+            started.wait(timeout=5)
+            raise KeyboardInterrupt
+
+        registry_blobs.side_effect = side_effect
+        monkeypatch.setattr(client_module, "MAX_CONCURRENT_DOWNLOADS", 1)
+        monkeypatch.setattr(client_module, "as_completed", as_completed)
+        with pytest.raises(KeyboardInterrupt):
+            docker_registry_client._download_blobs(
+                [
+                    (CanonicalReference(path="foo/bar", digest=Digest.from_bytes(content)), target, None)
+                    for content, target in zip(contents, targets)
+                ]
+            )
+        assert registry_blobs.call_count == 1
+        assert targets[0].read_bytes() == contents[0]
+        assert not any(target.exists() for target in targets[1:])
@@ -0,0 +1,100 @@
+import json
+import os
+import pathlib
+import tarfile
+
+import pytest
+
+from registry_client import errors, spec
+from registry_client.digest import Digest
+from registry_client.export import ImageV2Tar, OCIImageTar, SendfileTarFile
+from registry_client.media_types import OCIImageMediaType
+
+
+@pytest.fixture(scope="function")
+def tar_src_dir(tmp_path) -> pathlib.Path:
+    src_dir = tmp_path.joinpath("src")
+    src_dir.mkdir()
+    for index, size in enumerate((0, 1, 511, 512, 513, 1024 * 1024 + 1)):
+        src_dir.joinpath(f"file_{index}").write_bytes(os.urandom(size))
+    src_dir.joinpath("sub").mkdir()
+    src_dir.joinpath("sub", "layer.tar").write_bytes(b"foo" * 1000)
+    return src_dir
+
+
+def _tar(tar_cls, src_dir: pathlib.Path, target: pathlib.Path) -> bytes:
+    with tar_cls.open(target, "w") as tar_file:
+        tar_file.add(src_dir, arcname=os.path.sep)
+    return target.read_bytes()
+
+
+def test_sendfile_tar_same_as_tarfile(tar_src_dir, tmp_path):
+    want = _tar(tarfile.TarFile, tar_src_dir, tmp_path.joinpath("want.tar"))
+    assert _tar(SendfileTarFile, tar_src_dir, tmp_path.joinpath("got.tar")) == want
+
+
+def test_sendfile_tar_fallback(tar_src_dir, tmp_path, monkeypatch):
+    want = _tar(tarfile.TarFile, tar_src_dir, tmp_path.joinpath("want.tar"))
+
+    def sendfile(*args, **kwargs):
+        raise OSError("sendfile not supported")
+
+    monkeypatch.setattr(os, "sendfile", sendfile, raising=False)
+    got_path = tmp_path.joinpath("got.tar")
+    assert _tar(SendfileTarFile, tar_src_dir, got_path) == want
+    with tarfile.open(got_path) as tar_file:
+        member = tar_file.getmember("sub/layer.tar")
+        assert tar_file.extractfile(member).read() == b"foo" * 1000
+
+
+def _write_v2_image(image_dir: pathlib.Path) -> pathlib.Path:
+    layer = b"layer content"
+    layer_path = image_dir.joinpath("layer_id", "layer.tar")
+    layer_path.parent.mkdir(parents=True)
+    layer_path.write_bytes(layer)
+    config = json.dumps({"rootfs": {"type": "layers", "diff_ids": [Digest.from_bytes(layer).value]}}).encode()
+    config_path = image_dir.joinpath(Digest.from_bytes(config).hex)
+    config_path.write_bytes(config)
+    manifest = [{"Config": config_path.name, "RepoTags": [], "Layers": ["layer_id/layer.tar"]}]
+    image_dir.joinpath("manifest.json").write_text(json.dumps(manifest))
+    return layer_path
+
+
+def _write_oci_image(image_dir: pathlib.Path) -> pathlib.Path:
+    blob_dir = image_dir.joinpath("blobs", "sha256")
+    blob_dir.mkdir(parents=True)
+    manifest = b'{"schemaVersion": 2}'
+    manifest_digest = Digest.from_bytes(manifest)
+    manifest_path = blob_dir.joinpath(manifest_digest.hex)
+    manifest_path.write_bytes(manifest)
+    image_dir.joinpath(spec.ImageLayoutFile).write_text(spec.ImageLayout().json())
+    index = spec.Index(
+        mediaType=OCIImageMediaType.MediaTypeImageIndex,
+        manifests=[
+            spec.Descriptor(
+                mediaType=OCIImageMediaType.MediaTypeImageManifest,
+                digest=manifest_digest,
+                size=len(manifest),
+            )
+        ],
+    )
+    image_dir.joinpath("index.json").write_text(index.json(exclude_none=True))
+    return manifest_path
+
+
+@pytest.mark.parametrize(
+    "tar_cls, write_image",
+    (
+        (ImageV2Tar, _write_v2_image),
+        (OCIImageTar, _write_oci_image),
+    ),
+)
+def test_check_digest_mismatch(tmp_path, tar_cls, write_image):
+    image_dir = tmp_path.joinpath("image")
+    image_dir.mkdir()
+    blob_path = write_image(image_dir)
+    image_tar = tar_cls(src_dir=image_dir, target_path=tmp_path.joinpath("image.tar"))
+    image_tar.check()
+    blob_path.write_bytes(b"corrupted")
+    with pytest.raises(errors.ErrDigestMismatch):
+        image_tar.check()
@@ -531,3 +531,17 @@ def test_parse(testcase: Dict):
             assert tag and ref.tag == tag
         if hasattr(ref, "digest"):
             assert ref.digest.value == digest
+
+
+@pytest.mark.parametrize(
+    "name, want",
+    (
+        ("docker.io/library/foo", ("docker.io", "library/foo")),
+        ("foo", ("", "foo")),
+        ("", ("", "")),
+        ("Foo/Bar", ("", "Foo/Bar")),
+        ("a//b", ("", "a//b")),
+    ),
+)
+def test_split_domain(name, want):
+    assert reference.split_domain(name) == want
@@ -0,0 +1,80 @@
+import importlib.util
+import json
+import sys
+
+import pytest
+
+from registry_client import spec
+from registry_client.digest import Digest
+from registry_client.utlis import diff_ids_to_chain_ids, get_chain_id
+
+DIFF_IDS = [
+    "sha256:ca978112ca1bbdcafac231b39a23dc4da786eff8147c4e72b9807785afee48bb",
+    "sha256:3e23e8160039594a33894f6564e1b1348bbd7a0088d42c4acb73eeaed59c009d",
+    "sha256:2e7d2c03a9507ae265ecf5b5356885a53393a2029d241394997265a1a25aefc6",
+]
+CHAIN_IDS = [
+    "sha256:ca978112ca1bbdcafac231b39a23dc4da786eff8147c4e72b9807785afee48bb",
+    "sha256:51c0c8ace48498d6f5fee6b0592cc06f2da0f3cbe09c5a34a97dce85c3889676",
+    "sha256:2fce7f8ce91bcf0a1428b36e1024639fdbd9469eea762dba98aa749631885106",
+]
+
+
+@pytest.mark.parametrize("count", (1, 2, 3))
+def test_diff_ids_to_chain_ids(count):
+    assert list(diff_ids_to_chain_ids(DIFF_IDS[:count])) == CHAIN_IDS[:count]
+
+
+def test_diff_ids_to_chain_ids_with_digest():
+    assert list(diff_ids_to_chain_ids([Digest(diff_id) for diff_id in DIFF_IDS])) == CHAIN_IDS
+
+
+@pytest.mark.parametrize(
+    "parent, ids, want",
+    (
+        ("", DIFF_IDS[:1], CHAIN_IDS[0]),
+        ("", DIFF_IDS, CHAIN_IDS[-1]),
+        (CHAIN_IDS[0], DIFF_IDS[1:], CHAIN_IDS[-1]),
+        (CHAIN_IDS[1], [], CHAIN_IDS[1]),
+    ),
+)
+def test_get_chain_id(parent, ids, want):
+    assert get_chain_id(parent, ids) == want
+
+
+MANIFEST = {
+    "schemaVersion": 2,
+    "mediaType": "application/vnd.oci.image.manifest.v1+json",
+    "config": {
+        "mediaType": "application/vnd.oci.image.config.v1+json",
+        "digest": DIFF_IDS[0],
+        "size": 1,
+    },
+    "layers": [
+        {
+            "mediaType": "application/vnd.oci.image.layer.v1.tar+gzip",
+            "digest": DIFF_IDS[1],
+            "size": 1,
+        }
+    ],
+}
+
+
+@pytest.fixture(params=("orjson", "json"))
+def json_loads(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setitem(sys.modules, "orjson", None)
+    module_spec = importlib.util.find_spec("registry_client.utlis")
+    module = importlib.util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(module)
+    assert module.json_loads.__module__ == request.param
+    return module.json_loads
+
+
+def test_json_loads_manifest(json_loads):
+    content = json.dumps(MANIFEST).encode()
+    assert json_loads(content) == MANIFEST
+    manifest = spec.Manifest(**json_loads(content))
+    assert manifest.layers[0].digest == DIFF_IDS[1]